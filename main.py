@@ -3,120 +3,318 @@ import threading
 import sys
 import os
 import time
-from queue import Queue
 import signal
 import termios
 import tty
-import select
+import selectors
+import re
+import json
+
+# Output patterns for ping and iperf3, compiled once at import time. They match
+# raw bytes so lines never need decoding unless they are printed or parsed.
+# Both tools print these fragments in fixed case, so no case folding is needed.
+_PING_STATS_RE = re.compile(rb"(\d+)\s+packets transmitted,\s*(\d+)\s+(?:packets\s+)?received,.*?([\d.]+)%\s+packet\s+loss")
+_PING_RTT_RE = re.compile(rb"(?:rtt|round-trip) min/avg/max[^=]*=\s*([\d.]+)/([\d.]+)/([\d.]+)")
+_IPERF_LINE_RE = re.compile(rb"\[(TX-C|RX-C)\].*?([\d.]+)\s+([KMGT]?bits/sec)(?:.*?\b(sender|receiver)\b)?")
+_IPERF_DIRECTIONS = {b"TX-C": "tx", b"RX-C": "rx"}
+
+# Size of each read from the ping/iperf3 pipes
+READ_SIZE = 65536
+
+# Interval between ping packets, in seconds
+PING_INTERVAL = 0.2
+
+# How long to wait for ping/iperf3 to print their final output once stopped
+STOP_TIMEOUT = 3
+
+# Every possible progress bar, indexed by the number of filled cells
+_BAR_LEN = 30
+_BARS = tuple("=" * filled + "-" * (_BAR_LEN - filled) for filled in range(_BAR_LEN + 1))
 
 # Global flag for early termination
 early_stop = threading.Event()
 
-def run_ping(ip, results, verbose=False, stop_event=None):
-    """Run ping with 0.2s interval and collect results."""
-    process = subprocess.Popen(
-        ["ping", ip, "-i", "0.2"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1
-    )
+def parse_ping_line(line):
+    """Return the ping statistics found in a single line of raw output, if any."""
+    if b"transmitted" in line:
+        m = _PING_STATS_RE.search(line)
+        if m:
+            return dict(zip(("transmitted", "received", "loss"), (g.decode() for g in m.groups())))
+    elif b"min/avg/max" in line:
+        m = _PING_RTT_RE.search(line)
+        if m:
+            return dict(zip(("min_latency", "avg_latency", "max_latency"), (g.decode() for g in m.groups())))
+    return None
+
+def parse_iperf_line(line):
+    """Return the iperf3 bitrate found in a single line of raw output, if any."""
+    if b"bits/sec" not in line:
+        return None
+    m = _IPERF_LINE_RE.search(line)
+    if not m:
+        return None
+    direction, value, unit, role = m.groups()
+    bitrate = f"{value.decode()} {unit.decode()}"
+    if role:
+        return {f"{_IPERF_DIRECTIONS[direction]}_{role.decode()}": bitrate}
+    # Real-time measurement, kept in case no summary is printed
+    return {f"{_IPERF_DIRECTIONS[direction]}_last": bitrate}
+
+def parse_iperf_json(raw):
+    """Return the iperf3 bitrates found in its -J JSON report."""
     try:
-        for line in process.stdout:
-            if stop_event and stop_event.is_set():
+        data = json.loads(raw)
+    except ValueError:
+        return {}
+
+    state = {}
+    end = data.get("end") or {}
+    for key, section in (("tx_sender", "sum_sent"), ("tx_receiver", "sum_received"),
+                         ("rx_sender", "sum_sent_bidir_reverse"), ("rx_receiver", "sum_received_bidir_reverse")):
+        bits_per_second = (end.get(section) or {}).get("bits_per_second")
+        if bits_per_second is not None:
+            state[key] = format_bitrate(bits_per_second)
+
+    # Last real-time measurement, only needed if the run was cut short before the
+    # summary. Scan back from the end, skipping the empty interval an interrupted
+    # run can finish on, and stop as soon as both directions are found.
+    if "tx_sender" not in state or "rx_sender" not in state:
+        for interval in reversed(data.get("intervals") or []):
+            for key, section in (("tx_last", "sum"), ("rx_last", "sum_bidir_reverse")):
+                interval_sum = interval.get(section) or {}
+                if key not in state and interval_sum.get("seconds", 0) > 0:
+                    state[key] = format_bitrate(interval_sum["bits_per_second"])
+            if "tx_last" in state and "rx_last" in state:
                 break
-            line = line.strip()
-            if verbose:
-                print(f"[PING] {line}")
-            results.put(line)
-    except KeyboardInterrupt:
-        pass
-    finally:
-        # Send SIGINT instead of SIGTERM to allow ping to print statistics
-        process.send_signal(signal.SIGINT)
-        # Wait a bit for the summary to be printed
-        try:
-            process.wait(timeout=2)
-        except subprocess.TimeoutExpired:
-            process.kill()
-        # Collect any remaining output (the summary)
-        try:
-            remaining = process.stdout.read()
-            for line in remaining.split('\n'):
-                line = line.strip()
-                if line:
-                    if verbose:
-                        print(f"[PING] {line}")
-                    results.put(line)
-        except:
-            pass
+    return state
+
+def ping_argv(ip, duration, quiet=True):
+    """Return the command line for ping with PING_INTERVAL between packets.
 
-def run_iperf3(ip, duration, results, verbose=False, stop_event=None):
-    """Run iperf3 bidirectional test and collect results."""
-    env = os.environ.copy()
-    env["PYTHONUNBUFFERED"] = "1"
+    With quiet, ping sends just enough packets to cover duration and only
+    prints its final statistics instead of a line per reply.
+    """
+    argv = ["ping", ip, "-i", str(PING_INTERVAL)]
+    if quiet:
+        count = max(1, int(duration / PING_INTERVAL))
+        argv[1:1] = ["-q", "-c", str(count)]
+    return argv
 
+def iperf3_argv(ip, duration, json_output=True, cpu=None):
+    """Return the command line for an iperf3 bidirectional test.
+
+    With json_output, iperf3 prints a single JSON report when it exits instead
+    of human-readable progress lines. If cpu is given, iperf3 pins itself to it.
+    """
+    # stdbuf keeps iperf3's C stdio line-buffered on the pipe
+    argv = ["stdbuf", "-oL", "-eL", "iperf3", "-c", ip, "--bidir", "-t", str(duration)]
+    if json_output:
+        argv.append("-J")
+    if cpu is not None:
+        argv += ["-A", str(cpu)]
+    return argv
+
+def start_source(argv, tag, parser, stop_signal, whole_output=False):
+    """Start a tool with its output on a pipe and return its source record.
+
+    parser turns output into a dict of state updates. It is called once per
+    line, or once on the complete output if whole_output is set. stop_signal
+    is what the tool is sent to make it stop early.
+    """
     process = subprocess.Popen(
-        ["stdbuf", "-oL", "-eL", "iperf3", "-c", ip, "--bidir", "-t", str(duration)],
+        argv,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
-        env=env
+        bufsize=0
     )
+    return {"process": process, "tag": tag, "parser": parser, "stop_signal": stop_signal,
+            "whole_output": whole_output, "state": {}, "buffer": b"", "chunks": []}
+
+def pick_cpus():
+    """Return two distinct CPUs (for iperf3 and this script), or None if unavailable."""
+    if not hasattr(os, "sched_getaffinity"):
+        print("⚠️  CPU pinning is not supported on this platform, running unpinned")
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < 2:
+        print("⚠️  CPU pinning needs at least two CPUs, running unpinned")
+        return None
+    # Keep iperf3 off the first CPU, which usually takes the most interrupts
+    return cpus[-1], cpus[0]
+
+def stop_process(source):
+    """Send a source's stop signal to its process if it is still running."""
+    if source["process"].poll() is None:
+        source["process"].send_signal(source["stop_signal"])
+
+def handle_line(source, raw, verbose=False):
+    """Parse one line of a source's raw output into its state."""
+    if verbose:
+        line = raw.strip()
+        if line:
+            # Raw bytes straight to the binary layer; the caller flushes once per batch
+            sys.stdout.buffer.write(source["tag"] + line + b"\n")
+    # The parsers search the line and reject most of it on a substring check, so
+    # it is passed as-is rather than stripped
+    update = source["parser"](raw)
+    if update:
+        source["state"].update(update)
+
+def feed_output(source, chunk, verbose=False):
+    """Parse the complete lines in chunk, keeping any partial line for later."""
+    if source["whole_output"]:
+        # Whole-document output (iperf3 -J) is parsed once the process exits
+        source["chunks"].append(chunk)
+        return
+    *lines, source["buffer"] = (source["buffer"] + chunk).split(b"\n")
+    for raw in lines:
+        handle_line(source, raw, verbose)
+
+def read_output(selector, key, verbose=False):
+    """Read from a ready pipe, returning False once it has reached EOF."""
+    chunk = os.read(key.fd, READ_SIZE)
+    if chunk:
+        feed_output(key.data, chunk, verbose)
+        return True
+    selector.unregister(key.fileobj)
+    return False
+
+def drain_output(source, verbose=False):
+    """Reap a source's process, killing it if needed, and parse what is left on its pipe."""
+    process = source["process"]
+    if process.poll() is None:
+        process.kill()
+    process.wait()
+    fd = process.stdout.fileno()
+    while chunk := os.read(fd, READ_SIZE):
+        feed_output(source, chunk, verbose)
+    process.stdout.close()
+    if source["whole_output"]:
+        source["state"].update(source["parser"](b"".join(source["chunks"])))
+    else:
+        handle_line(source, source["buffer"], verbose)
+    source["buffer"] = b""
+    source["chunks"] = []
+
+def run_benchmark(ip, duration, verbose=False, stop_event=early_stop, pin=False):
+    """Run ping alongside iperf3, multiplexing their output on a single thread.
+
+    stop_event ends the test early when set, and is set on 'q' or Ctrl-C. With
+    pin, iperf3 and this script are pinned to two different CPUs so the
+    single-threaded iperf3 is not migrated between cores during the test.
+    Returns the parsed ping and iperf3 state dicts.
+    """
+    cpus = pick_cpus() if pin else None
+    # Send SIGINT instead of SIGTERM to ping to allow it to print statistics
+    ping = start_source(ping_argv(ip, duration, quiet=not verbose), b"[PING] ", parse_ping_line, signal.SIGINT)
+    # Verbose mode wants iperf3's live progress lines, so only ask for JSON otherwise
+    iperf = start_source(iperf3_argv(ip, duration, json_output=not verbose, cpu=cpus[0] if cpus else None),
+                         b"[IPERF3] ", parse_iperf_line if verbose else parse_iperf_json, signal.SIGTERM,
+                         whole_output=not verbose)
+    sources = (ping, iperf)
+
+    # Everything after spawning is set up inside the try, so the tools are always
+    # stopped and reaped, and the terminal restored, whatever fails
+    selector = selectors.DefaultSelector()
+    wakeup_r = wakeup_w = old_wakeup_fd = None
+    old_settings = None
+    progress = None
     try:
-        for line in process.stdout:
-            if stop_event and stop_event.is_set():
-                process.terminate()
-                break
-            line = line.strip()
+        if cpus:
+            # Only after spawning, so ping and iperf3 don't inherit this script's CPU
+            os.sched_setaffinity(0, {cpus[1]})
+
+        for source in sources:
+            selector.register(source["process"].stdout, selectors.EVENT_READ, data=source)
+
+        # Signals are written to this pipe by the interpreter's C-level handler, so
+        # Ctrl-C wakes the selector immediately instead of waiting for a Python handler
+        wakeup_r, wakeup_w = os.pipe()
+        os.set_blocking(wakeup_r, False)
+        os.set_blocking(wakeup_w, False)
+        selector.register(wakeup_r, selectors.EVENT_READ, data="signal")
+        old_wakeup_fd = signal.set_wakeup_fd(wakeup_w)
+
+        if not verbose:
+            # Set terminal to cbreak mode to capture single key presses
+            old_settings = termios.tcgetattr(sys.stdin)
+            tty.setcbreak(sys.stdin.fileno())
+            selector.register(sys.stdin, selectors.EVENT_READ, data="key")
+            progress = progress_bar(duration)
+            next(progress)
+
+        iperf_done = False
+        # Ticks are anchored to the start time so the progress bar does not drift
+        start = time.monotonic()
+        ticks = 0
+        # Without -v the test always lasts the full duration, as ping keeps measuring
+        # even if iperf3 exits early (e.g. connection refused)
+        while not stop_event.is_set() and not (iperf_done and (verbose or ticks >= duration)):
+            for key, _ in selector.select(timeout=max(0.0, start + ticks + 1 - time.monotonic())):
+                if key.data == "signal":
+                    if signal.SIGINT in os.read(wakeup_r, 512):
+                        print("\n\n⚠️  Early stop requested (Ctrl-C pressed)...", flush=True)
+                        stop_event.set()
+                    continue
+                if key.data == "key":
+                    # Check for 'q' key press
+                    if sys.stdin.read(1).lower() == 'q':
+                        print("\n\n⚠️  Early stop requested (q pressed)...", flush=True)
+                        stop_event.set()
+                    continue
+                if not read_output(selector, key, verbose):
+                    iperf_done = iperf_done or key.data is iperf
             if verbose:
-                print(f"[IPERF3] {line}")
-            results.put(line)
-    except KeyboardInterrupt:
-        pass
+                sys.stdout.buffer.flush()
+            # Catch up on every second that has passed, even if the loop fell behind
+            while start + ticks + 1 <= time.monotonic():
+                ticks += 1
+                if progress:
+                    next(progress, None)
     finally:
-        if process.poll() is None:
-            process.terminate()
-            try:
-                process.wait(timeout=2)
-            except subprocess.TimeoutExpired:
-                process.kill()
-        # Collect any remaining output
-        try:
-            remaining = process.stdout.read()
-            for line in remaining.split('\n'):
-                line = line.strip()
-                if line:
-                    if verbose:
-                        print(f"[IPERF3] {line}")
-                    results.put(line)
-        except:
-            pass
+        if old_wakeup_fd is not None:
+            signal.set_wakeup_fd(old_wakeup_fd)
+        if wakeup_r is not None:
+            if wakeup_r in selector.get_map():
+                selector.unregister(wakeup_r)
+            os.close(wakeup_r)
+            os.close(wakeup_w)
+        if sys.stdin in selector.get_map():
+            selector.unregister(sys.stdin)
+        if progress:
+            progress.close()
+        if old_settings is not None:
+            # Restore terminal settings
+            termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
+
+        for source in sources:
+            stop_process(source)
+
+        # Collect remaining output (including ping's summary) until both pipes close
+        deadline = time.monotonic() + STOP_TIMEOUT
+        while selector.get_map():
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            for key, _ in selector.select(timeout=timeout):
+                read_output(selector, key, verbose)
+        selector.close()
+
+        for source in sources:
+            drain_output(source, verbose)
+        if verbose:
+            sys.stdout.buffer.flush()
+
+    return ping["state"], iperf["state"]
 
-def summarize_ping(ping_lines):
-    """Extract packet statistics and latency from Linux ping output."""
-    transmitted = received = loss = None
-    min_latency = avg_latency = max_latency = None
-
-    for line in ping_lines:
-        line_lower = line.lower()
-        if "packets transmitted" in line_lower:
-            try:
-                parts = [p.strip() for p in line.split(",")]
-                transmitted = parts[0].split()[0]
-                received = parts[1].split()[0]
-                loss = parts[2].split("%")[0].split()[-1]
-            except (IndexError, ValueError):
-                pass
-        elif "rtt min/avg/max" in line_lower or "round-trip min/avg/max" in line_lower:
-            try:
-                stats = line.split("=")[1].strip().split("/")
-                min_latency = stats[0].strip()
-                avg_latency = stats[1].strip()
-                max_latency = stats[2].strip().split()[0]  # Remove unit if present
-            except (IndexError, ValueError):
-                pass
+def summarize_ping(ping_state):
+    """Format packet statistics and latency parsed from ping output."""
+    transmitted = ping_state.get("transmitted")
+    received = ping_state.get("received")
+    loss = ping_state.get("loss")
+    min_latency = ping_state.get("min_latency")
+    avg_latency = ping_state.get("avg_latency")
+    max_latency = ping_state.get("max_latency")
 
     if transmitted and received and loss:
         result = []
@@ -138,75 +336,20 @@ def summarize_ping(ping_lines):
     else:
         return "No valid ping summary found."
 
-def summarize_iperf(iperf_lines):
-    """Extract iperf3 sender/receiver results with cleaner formatting."""
-    summary_lines = [l for l in iperf_lines if "sender" in l.lower() or "receiver" in l.lower()]
-    
-    # Parse TX and RX results
-    tx_sender = tx_receiver = rx_sender = rx_receiver = None
-    
-    for line in summary_lines:
-        parts = line.split()
-        if len(parts) < 7:
-            continue
-        
-        # Extract bitrate (typically second to last value before "Mbits/sec" or "Gbits/sec")
-        try:
-            # Find the position of "sender" or "receiver"
-            if "sender" in line.lower():
-                is_sender = True
-            else:
-                is_sender = False
-            
-            # Look for bitrate value
-            bitrate_idx = -3  # Usually: ... XXX Mbits/sec sender/receiver
-            bitrate = parts[bitrate_idx]
-            unit = parts[bitrate_idx + 1]
-            
-            if "[TX-C]" in line or "TX-C" in line:
-                if is_sender:
-                    tx_sender = f"{bitrate} {unit}"
-                else:
-                    tx_receiver = f"{bitrate} {unit}"
-            elif "[RX-C]" in line or "RX-C" in line:
-                if is_sender:
-                    rx_sender = f"{bitrate} {unit}"
-                else:
-                    rx_receiver = f"{bitrate} {unit}"
-        except (IndexError, ValueError):
-            continue
-    
-    # If we don't have summary lines, try to extract from real-time output (last values)
-    if not tx_sender or not rx_sender:
-        # Look for the last real-time measurements
-        tx_lines = [l for l in iperf_lines if "[TX-C]" in l and "sender" not in l.lower() and "receiver" not in l.lower()]
-        rx_lines = [l for l in iperf_lines if "[RX-C]" in l and "sender" not in l.lower() and "receiver" not in l.lower()]
-        
-        # Get last TX measurement
-        if tx_lines and not tx_sender:
-            try:
-                last_tx = tx_lines[-1].split()
-                # Find Mbits/sec or Gbits/sec
-                for i, part in enumerate(last_tx):
-                    if "bits/sec" in part and i > 0:
-                        tx_sender = f"{last_tx[i-1]} {part}"
-                        tx_receiver = tx_sender  # Approximate
-                        break
-            except (IndexError, ValueError):
-                pass
-        
-        # Get last RX measurement
-        if rx_lines and not rx_sender:
-            try:
-                last_rx = rx_lines[-1].split()
-                # Find Mbits/sec or Gbits/sec
-                for i, part in enumerate(last_rx):
-                    if "bits/sec" in part and i > 0:
-                        rx_sender = f"{last_rx[i-1]} {part}"
-                        rx_receiver = rx_sender  # Approximate
-                        break
-            except (IndexError, ValueError):
-                pass
+def summarize_iperf(iperf_state):
+    """Format iperf3 sender/receiver results with cleaner formatting."""
+    tx_sender = iperf_state.get("tx_sender")
+    tx_receiver = iperf_state.get("tx_receiver")
+    rx_sender = iperf_state.get("rx_sender")
+    rx_receiver = iperf_state.get("rx_receiver")
+
+    # If we don't have summary lines, fall back to the last real-time measurements
+    if not tx_sender and iperf_state.get("tx_last"):
+        tx_sender = iperf_state["tx_last"]
+        tx_receiver = tx_sender  # Approximate
+    if not rx_sender and iperf_state.get("rx_last"):
+        rx_sender = iperf_state["rx_last"]
+        rx_receiver = rx_sender  # Approximate
     
     result = []
     if tx_sender or tx_receiver:
@@ -227,6 +370,21 @@ def summarize_iperf(iperf_lines):
     
     return "\n".join(result) if result else "No valid iperf3 results parsed."
 
+def format_bitrate(bits_per_second):
+    """Format a bitrate the way iperf3 prints it, e.g. '943 Mbits/sec'."""
+    value = float(bits_per_second)
+    prefix = ""
+    for unit in ("K", "M", "G", "T"):
+        if value < 1000:
+            break
+        value /= 1000
+        prefix = unit
+    if value < 9.995:
+        return f"{value:.2f} {prefix}bits/sec"
+    if value < 99.95:
+        return f"{value:.1f} {prefix}bits/sec"
+    return f"{value:.0f} {prefix}bits/sec"
+
 def seconds_to_hms(seconds):
     """Convert seconds to a string in H:M:S format."""
     h = seconds // 3600
@@ -234,64 +392,45 @@ def seconds_to_hms(seconds):
     s = seconds % 60
     return f"{int(h)}:{int(m):02}:{int(s):02}"
 
-def check_for_key_press():
-    """Check if 'q' key has been pressed (non-blocking)."""
-    if select.select([sys.stdin], [], [], 0)[0]:
-        key = sys.stdin.read(1)
-        return key.lower() == 'q'
-    return False
+def progress_bar(duration):
+    """Draw a simple progress bar, advancing one second per next() call.
+
+    Closing the generator prints the final bar if it was advanced all the way to
+    duration, and clears it otherwise.
+    """
+    inv_duration = 1.0 / duration
+    duration_hms = seconds_to_hms(duration)
+    # Pad every redraw to the widest possible line so shorter ones overwrite it
+    line_width = len(f"[{_BARS[-1]}] 100% | Elapsed: {duration_hms} | Remaining: {duration_hms} (q=stop)")
 
-def progress_bar(duration, stop_event):
-    """Display a simple progress bar for duration seconds, can be stopped early."""
-    # Set terminal to raw mode to capture single key presses
-    old_settings = termios.tcgetattr(sys.stdin)
+    elapsed = 0
     try:
-        tty.setcbreak(sys.stdin.fileno())
-        
-        for elapsed in range(duration):
-            if stop_event.is_set():
-                break
-                
-            # Check for 'q' key press
-            if check_for_key_press():
-                print("\n\n⚠️  Early stop requested (q pressed)...")
-                stop_event.set()
-                break
-            
-            bar_len = 30
-            filled = int((elapsed+1)/duration * bar_len)
-            percentage = int((elapsed+1)/duration * 100)
-            remaining = duration - (elapsed + 1)
-            elapsed_hms = seconds_to_hms(elapsed+1)
-            remaining_hms = seconds_to_hms(remaining)
-            bar = "=" * filled + "-" * (bar_len - filled)
-            
-            # Print progress bar with percentage and hint
-            print(f"\r[{bar}] {percentage}% (Press 'q' to stop early)", end="", flush=True)
-            # Move to next line and print time info
-            print(f"\nElapsed: {elapsed_hms} | Remaining: {remaining_hms}", end="", flush=True)
-            # Move cursor back up to overwrite both lines next iteration
-            print("\033[F", end="", flush=True)
-            
-            time.sleep(1)
-        
-        if not stop_event.is_set():
+        for elapsed in range(duration + 1):
+            fraction = elapsed * inv_duration
+            filled = int(fraction * _BAR_LEN)
+            percentage = int(fraction * 100)
+            remaining = duration - elapsed
+
+            # Redraw the whole progress line in place with a single write, formatting
+            # H:MM:SS inline rather than through seconds_to_hms() on every tick
+            line = (f"[{_BARS[filled]}] {percentage:3d}% | "
+                    f"Elapsed: {elapsed // 3600}:{elapsed % 3600 // 60:02}:{elapsed % 60:02} | "
+                    f"Remaining: {remaining // 3600}:{remaining % 3600 // 60:02}:{remaining % 60:02} (q=stop)")
+            sys.stdout.write("\r" + line.ljust(line_width))
+            sys.stdout.flush()
+            yield
+    finally:
+        if elapsed == duration:
             # Final output for normal completion
-            print(f"\r[{'='*bar_len}] 100%                                ")
-            print(f"Elapsed: {seconds_to_hms(duration)} | Remaining: {seconds_to_hms(0)}")
+            line = f"[{_BARS[-1]}] 100% | Elapsed: {duration_hms} | Remaining: {seconds_to_hms(0)}"
+            sys.stdout.write("\r" + line.ljust(line_width) + "\n")
         else:
             # Clear the progress line
-            print("\r" + " " * 80)
-            print(" " * 80)
-            print("\033[F\033[F", end="", flush=True)
-    finally:
-        # Restore terminal settings
-        termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
+            sys.stdout.write("\r" + " " * line_width + "\r")
+        sys.stdout.flush()
 
 def signal_handler(signum, frame):
-    """Handle Ctrl-C gracefully."""
-    print("\n\n⚠️  Early stop requested (Ctrl-C pressed)...")
-    early_stop.set()
+    """Swallow Ctrl-C; run_benchmark picks it up from the signal wakeup fd."""
 
 if __name__ == "__main__":
     verbose_mode = False
@@ -301,9 +440,16 @@ if __name__ == "__main__":
         verbose_mode = True
         args.remove("-v")
 
-    if len(args) != 2:
-        print(f"Usage: {sys.argv[0]} [-v] <ip> <time>")
+    pin_mode = False
+    if "--pin" in args:
+        pin_mode = True
+        args.remove("--pin")
+
+    if len(args) != 2 or not args[1].isdigit() or int(args[1]) <= 0:
+        print(f"Usage: {sys.argv[0]} [-v] [--pin] <ip> <time>")
+        print("  <time>: test duration in seconds (at least 1)")
         print("  -v: verbose mode (show live output)")
+        print("  --pin: pin iperf3 and this script to separate CPUs (Linux, 2+ CPUs)")
         print("  Press 'q' or Ctrl-C during test to stop early and see results")
         sys.exit(1)
 
@@ -313,59 +459,21 @@ if __name__ == "__main__":
     # Set up signal handler for Ctrl-C
     signal.signal(signal.SIGINT, signal_handler)
 
-    ping_results = Queue()
-    iperf_results = Queue()
-
-    ping_thread = threading.Thread(target=run_ping, args=(ip, ping_results, verbose_mode, early_stop), daemon=True)
-    iperf_thread = threading.Thread(target=run_iperf3, args=(ip, duration, iperf_results, verbose_mode, early_stop))
-
-    ping_thread.start()
-    iperf_thread.start()
-
-    if not verbose_mode:
-        progress_bar(duration, early_stop)
-    else:
-        # In verbose mode, just wait for threads but still allow Ctrl-C
-        try:
-            while iperf_thread.is_alive():
-                iperf_thread.join(timeout=0.5)
-                if early_stop.is_set():
-                    break
-        except KeyboardInterrupt:
-            print("\n\n⚠️  Early stop requested (Ctrl-C pressed)...")
-            early_stop.set()
-
-    # Wait for iperf to finish (it should finish quickly after early_stop is set)
-    iperf_thread.join(timeout=3)
+    ping_state, iperf_state = run_benchmark(ip, duration, verbose_mode, early_stop, pin_mode)
 
     # Track if this was an actual early stop
     was_early_stop = early_stop.is_set()
-    
-    # Always signal ping to stop and produce summary (whether early stop or normal completion)
-    early_stop.set()
-    
-    # Give ping time to finish and output its summary
-    time.sleep(1.0)
 
     if was_early_stop:
         print("\n⚠️  Test stopped early - showing partial results\n")
     else:
         print("\n✅ Test complete.\n")
 
-    # Collect results
-    ping_lines = []
-    while not ping_results.empty():
-        ping_lines.append(ping_results.get())
-
-    iperf_lines = []
-    while not iperf_results.empty():
-        iperf_lines.append(iperf_results.get())
-
     # Print summary
     print("=== Summary ===")
     print("📡 Ping:")
-    for line in summarize_ping(ping_lines).split('\n'):
+    for line in summarize_ping(ping_state).split('\n'):
         print("  " + line)
     print("\n🚀 iPerf3:")
-    for line in summarize_iperf(iperf_lines).split('\n'):
+    for line in summarize_iperf(iperf_state).split('\n'):
         print("  " + line)
\ No newline at end of file